@@ -1,9 +1,27 @@
 import os
-import re
-import io
+import json
+import bisect
+import functools
+import logging
+import threading
+from array import array
 from pathlib import Path
+from types import MappingProxyType
 
-import ijson
+try:
+    # orjson is an optional dependency which parses large compiler outputs considerably faster
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Oldest compiler version the mapper has been tested with
+_OLDEST_TESTED_COMPILER_VERSION = (0, 5, 17)
+
+# Length of the instruction starting with a given opcode: opcode plus n data bytes for PUSHn (0x60 - 0x7f), otherwise 1
+_INSTRUCTION_LENGTHS = bytes(op - 0x5e if 0x60 <= op <= 0x7f else 1 for op in range(256))
 
 class MapperResult:
     """
@@ -52,7 +70,7 @@ class Mapper:
     """
     @staticmethod
     def map_hex_address(
-            compiler_output_json: str,
+            compiler_output_json: str | dict,
             address_hex: str,
             contract_name: str) \
             -> MapperResult:
@@ -64,7 +82,8 @@ class Mapper:
                 the compiler output to find the exact instruction that corresponds to the given address.
 
                 Args:
-                    compiler_output_json (str): Path to the JSON output from the Solidity compiler.
+                    compiler_output_json (str | dict): Path to the JSON output from the Solidity compiler,
+                                                       or the already parsed JSON output.
                     address_hex (str): Hexadecimal address to map (can handle both with and without '0x' prefix).
                     contract_name (str): Name of the contract containing the address.
 
@@ -84,42 +103,183 @@ class Mapper:
                     print(f"Address maps to: {result}")
                     ```
                 """
+        return Mapper.map_hex_addresses(compiler_output_json, [address_hex], contract_name)[0]
+
+    @staticmethod
+    def map_hex_addresses(
+            compiler_output_json: str | dict,
+            addresses_hex: list[str],
+            contract_name: str) \
+            -> list[MapperResult]:
+        """
+        Maps several hexadecimal addresses of the same contract to their corresponding source code locations.
+
+        The compiler output is read only once for all addresses, which makes this method considerably faster
+        than calling ``map_hex_address`` for each address.
+
+        Args:
+            compiler_output_json (str | dict): Path to the JSON output from the Solidity compiler,
+                                               or the already parsed JSON output.
+            addresses_hex (list[str]): Hexadecimal addresses to map (can handle both with and without '0x' prefix).
+            contract_name (str): Name of the contract containing the addresses.
+
+        Returns:
+            list[MapperResult]: One result per address, in the same order as ``addresses_hex``.
+                                Errors are reported per address in the same way as by ``map_hex_address``.
+        """
         try:
+            contract = Mapper._load_contract(compiler_output_json, contract_name)
+        except Exception as ex:
+            return [MapperResult(contract_name, ex.__str__(), 0) for _ in addresses_hex]
+        return [Mapper._map_address(contract, address_hex) for address_hex in addresses_hex]
 
-            if not os.path.isfile(compiler_output_json):
-                raise FileNotFoundError(f"compiler_output_json not found: {compiler_output_json}")
+    @staticmethod
+    def clear_caches():
+        """
+        Clears all caches of the mapper, e.g. to release the memory held for previously mapped contracts.
 
-            address_dec = int(address_hex, 16)
-            # contract node is the node representing the contract in the json file.
-            contract_node = Mapper._contract_key_for_contract_name(compiler_output_json, contract_name)
-            if contract_node == contract_name:
-                print("WARNING: contract file name is equal to contract name, likely you have used the solidity file name as contract name.")
-            meta_data_json = Mapper._read_from_json_file(compiler_output_json,f"contracts.{contract_node}.{contract_name}.metadata")
+        Loaded contracts, decoded bytecode, source maps and sources are cached to speed up repeated
+        lookups. Modified compiler outputs are detected and read again, so clearing is never required
+        for correctness.
+        """
+        for cached in (Mapper._load_contract_cached, Mapper._encode_source, Mapper._newline_offsets,
+                       Mapper._instruction_index_table, Mapper._decode_bytecode, Mapper._source_map_entries):
+            cached.cache_clear()
 
-            #Verify compiler version
-            compiler_version = Mapper._read_from_json_string(meta_data_json, "compiler.version")
-            if compiler_version < "0.5.17":
-                print(f"WARNING: The contract has been compiled using compiler version {compiler_version}. "
-                      "The mapper has not been tested with this version. ")
+    @staticmethod
+    def _load_contract(compiler_output_json: str | dict, contract_name: str) -> MappingProxyType:
+        """
+        Reads everything needed to map addresses of a contract from the compiler output.
 
+        Args:
+            compiler_output_json (str | dict): Path to the JSON output from the Solidity compiler,
+                                               or the already parsed JSON output.
+            contract_name (str): Name of the contract.
+
+        Returns:
+            Mapping: A read-only mapping containing:
+                - 'name': The contract name (str)
+                - 'node': The key of the source file containing the contract in the compiler output (str)
+                - 'bytecode': The deployed bytecode as hex string (str)
+                - 'source_map': The source map of the deployed bytecode (str)
+                - 'source_names': Maps source file ids to source names (read-only Mapping)
+                - 'source_contents': Maps source names to their literal content from the metadata,
+                  or None if the metadata doesn't include it (read-only Mapping)
+
+        Raises:
+            FileNotFoundError: If the compiler output does not exist.
+            ValueError: If the contract cannot be found in the compiler output.
+        """
+        if isinstance(compiler_output_json, dict):
+            # A parsed compiler output is owned by the caller, therefore the contract is not cached
+            return Mapper._contract_from_compiler_output(compiler_output_json, contract_name, "<parsed compiler output>")
+        if not os.path.isfile(compiler_output_json):
+            raise FileNotFoundError(f"compiler_output_json not found: {compiler_output_json}")
+
+        # The modification time is part of the cache key, so that a recompiled contract is read again.
+        return Mapper._load_contract_cached(
+            compiler_output_json, os.stat(compiler_output_json).st_mtime_ns, contract_name)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _load_contract_cached(compiler_output_json: str, modification_time: int, contract_name: str) -> MappingProxyType:
+        """
+        Cached implementation of ``_load_contract``. Repeated lookups into the same contract,
+        e.g. by consecutive ``map_hex_address`` calls, share the contract read on the first lookup.
+
+        Args:
+            compiler_output_json (str): Path to the JSON output from the Solidity compiler.
+            modification_time (int): Modification time of the compiler output in nanoseconds (cache key only).
+            contract_name (str): Name of the contract.
+
+        Returns:
+            Mapping: See ``_load_contract``. The mapping is read-only, since it is shared between callers.
+        """
+        compiler_output = Mapper._parse_json_file(compiler_output_json)
+        return Mapper._contract_from_compiler_output(compiler_output, contract_name, compiler_output_json)
+
+    @staticmethod
+    def _contract_from_compiler_output(compiler_output: dict, contract_name: str, file_path: str) -> MappingProxyType:
+        """
+        Extracts everything needed to map addresses of a contract from the parsed compiler output.
+
+        Args:
+            compiler_output (dict): The parsed JSON output from the Solidity compiler.
+            contract_name (str): Name of the contract.
+            file_path (str): Path to the compiler output, used in error messages.
+
+        Returns:
+            Mapping: See ``_load_contract``.
+        """
+        # contract node is the node representing the contract in the json file.
+        contract_node = Mapper._contract_key_for_contract_name(compiler_output, contract_name, file_path)
+        if contract_node == contract_name:
+            logger.warning("contract file name is equal to contract name, likely you have used the solidity file name as contract name.")
+        meta_data_json = Mapper._read_from_json_content(compiler_output, ("contracts", contract_node, contract_name, "metadata"), file_path)
+
+        #Verify compiler version
+        compiler_version = Mapper._read_from_json_string(meta_data_json, ("compiler", "version"))
+        if Mapper._version_tuple(compiler_version) < _OLDEST_TESTED_COMPILER_VERSION:
+            logger.warning("The contract has been compiled using compiler version %s. "
+                           "The mapper has not been tested with this version. ", compiler_version)
+
+        # Only the literal content of the sources is kept from the metadata
+        meta_data_sources = Mapper._read_from_json_string(meta_data_json, ("sources",))
+        source_contents = {source_name: source.get('content') for source_name, source in meta_data_sources.items()}
+
+        return MappingProxyType({
+            'name': contract_name,
+            'node': contract_node,
+            'bytecode': Mapper._read_from_json_content(compiler_output, ("contracts", contract_node, contract_name, "evm", "deployedBytecode", "object"), file_path),
+            'source_map': Mapper._read_from_json_content(compiler_output, ("contracts", contract_node, contract_name, "evm", "deployedBytecode", "sourceMap"), file_path),
+            'source_names': Mapper._source_names_by_file_id(Mapper._read_from_json_content(compiler_output, ("sources",), file_path)),
+            'source_contents': MappingProxyType(source_contents),
+        })
+
+    @staticmethod
+    def _version_tuple(version: str) -> tuple[int, ...]:
+        """
+        Converts a compiler version (e.g. "0.8.26+commit.8a97fa7a") into a tuple of integers (e.g. (0, 8, 26)),
+        so that versions compare numerically instead of lexicographically.
+
+        Args:
+            version (str): The compiler version as found in the metadata.
+
+        Returns:
+            tuple: The major, minor and patch version. Non-numeric parts are ignored.
+        """
+        release = version.split('+')[0].split('-')[0]
+        return tuple(int(part) for part in release.split('.') if part.isdigit())
+
+    @staticmethod
+    def _map_address(contract: MappingProxyType, address_hex: str) -> MapperResult:
+        """
+        Maps a single hexadecimal address of a contract loaded by ``_load_contract``.
+
+        Args:
+            contract (Mapping): The contract as returned by ``_load_contract``.
+            address_hex (str): Hexadecimal address to map (can handle both with and without '0x' prefix).
+
+        Returns:
+            MapperResult: Object containing file path, code snippet, and line number, or the error as described
+                          in ``map_hex_address``.
+        """
+        try:
+            address_dec = int(address_hex, 16)
 
             # Map hex address to instruction index
-            bin_runtime = Mapper._read_from_json_file(compiler_output_json, f"contracts.{contract_node}.{contract_name}.evm.deployedBytecode.object")
-            instruction_index = Mapper._instruction_index_from_hex_address(address_dec, bin_runtime)
-            del bin_runtime # Free memory
+            instruction_index = Mapper._instruction_index_from_hex_address(address_dec, contract['bytecode'])
             if instruction_index == 0:
                 raise ValueError(f"Could not find instruction for index {instruction_index} in deployedBytecode.object."
                     "This may happen for an invalid hex address.")
 
             # Get instruction for given instruction index
-            srcmap_runtime = Mapper._read_from_json_file(compiler_output_json, f"contracts.{contract_node}.{contract_name}.evm.deployedBytecode.sourceMap")
             try:
-                instruction = Mapper._instruction_from_instruction_index(srcmap_runtime, instruction_index)
+                instruction = Mapper._instruction_from_instruction_index(contract['source_map'], instruction_index)
             except ValueError as ex:
                 return MapperResult(
-                    contract_node, ex.__str__(),0)
+                    contract['node'], ex.__str__(),0)
 
-            del srcmap_runtime # Free memory
             if instruction is None:
                 raise ValueError(f"Could not find instruction for index {instruction_index} in source map."
                     "This may happen for an invalid hex address.")
@@ -129,25 +289,25 @@ class Mapper:
                     "This may happen for bytecode sections stemming from compiler-generated inline assembly statements.")
 
             return Mapper._source_code_from_instruction(
-                compiler_output_json=compiler_output_json,
                 instruction=instruction,
-                meta_data_json=meta_data_json
+                source_names=contract['source_names'],
+                source_contents=contract['source_contents']
             )
         except Exception as ex:
-            return MapperResult(contract_name, ex.__str__(), 0)
+            return MapperResult(contract['name'], ex.__str__(), 0)
 
     @staticmethod
-    def _source_code_from_instruction(compiler_output_json:str ,instruction: dict,meta_data_json: str):
+    def _source_code_from_instruction(instruction: dict, source_names: MappingProxyType, source_contents: MappingProxyType):
         """
         Extracts and maps a specific segment of source code based on instruction details, compiler output, and metadata.
 
         Parameters:
-        compiler_output_json: str
-            A JSON file path of the compiler's output, containing source IDs and their metadata mappings.
         instruction: dict
             A dictionary containing specific details (file_id, offset, length) to reference the required code snippet.
-        meta_data_json: str
-            A JSON string of metadata that includes mapping and potentially literal content of source files.
+        source_names: Mapping
+            Maps the source file ids of the compiler output to their source names.
+        source_contents: Mapping
+            Maps the source names of the metadata to their literal content (None if the metadata doesn't include it).
 
         Returns:
         str
@@ -159,34 +319,47 @@ class Mapper:
             - If the referenced source in metadata does not include actual code content.
         """
         try:
-            source = next(filter(lambda x: x[1]['id'] == instruction["file_id"],
-                                 Mapper._read_from_json_file(compiler_output_json, "sources").items()))
-        except StopIteration:
+            source_name = source_names[instruction["file_id"]]
+        except KeyError:
             raise ValueError(
                 f"The address references a compiler-internal file (file id: {instruction['file_id']}) and cannot be mapped to the source code.")
 
-        source_name = source[0]
-        source = next(
-            filter(lambda x: x[0] == source_name, Mapper._read_from_json_string(meta_data_json, "sources").items()))
-        if not 'content' in source[1]:
+        if source_name not in source_contents:
+            raise ValueError(f"The metadata doesnt include the source '{source_name}'.")
+        content = source_contents[source_name]
+        if content is None:
             raise ValueError(
                 f"The metadata of source '{source_name}' doesnt include the source code. Did you set useLiteralContent true?")
 
         snippet = Mapper._read_snippet_from_string(
-            string_content=source[1]['content'],
+            string_content=content,
             start=instruction['offset'],
             length=instruction['length'])
 
         return MapperResult(file=source_name, code=snippet['code'], line=snippet['line'])
 
     @staticmethod
-    def _contract_key_for_contract_name(combined_json_path: str, contract_name: str) -> str:
+    def _source_names_by_file_id(sources: dict) -> MappingProxyType:
+        """
+        Builds a lookup table from source file id to source name.
+
+        Args:
+            sources (dict): The "sources" section of the compiler output.
+
+        Returns:
+            Mapping: Maps each source file id (int) to the name of its source (str). The mapping is read-only.
+        """
+        return MappingProxyType({source['id']: source_name for source_name, source in sources.items()})
+
+    @staticmethod
+    def _contract_key_for_contract_name(combined_json: dict, contract_name: str, combined_json_path: str) -> str:
         """
         Finds the fully qualified contract key in the combined JSON for a given contract name.
 
         Args:
-            combined_json_path (str): Path to the combined JSON output from the Solidity compiler.
+            combined_json (dict): The parsed combined JSON output from the Solidity compiler.
             contract_name (str): Name of the contract to find.
+            combined_json_path (str): Path to the combined JSON output, used in error messages.
 
         Returns:
             str: The fully qualified contract key as it appears in the combined JSON.
@@ -194,7 +367,7 @@ class Mapper:
         Raises:
             ValueError: If multiple contracts match the name or if no contract is found.
         """
-        contracts = Mapper._read_from_json_file(combined_json_path, "contracts")
+        contracts = Mapper._read_from_json_content(combined_json, ("contracts",), combined_json_path)
         matches = Mapper._contract_name_matches(contract_name, contracts.items())
         if len(matches) > 1:
             raise ValueError(
@@ -208,8 +381,9 @@ class Mapper:
         """
         Filters contract options to find those matching the given contract name.
 
-        Performs case-insensitive regex matching to find contracts whose path/name
-        contains the specified contract name.
+        Performs case-insensitive matching to find contracts whose path contains a segment
+        starting with the specified contract name (e.g. "contracts/BeerBar.sol" for "BeerBar").
+        Plain string comparisons are used instead of a regex, so the contract name needs no escaping.
 
         Args:
             contract_name (str): The contract name to match.
@@ -218,47 +392,80 @@ class Mapper:
         Returns:
             list: A list of matching (key, value) pairs.
         """
-        regex = f"(^|[\\/]){contract_name}.*"
-        matches = list(filter(lambda x: re.search(regex, x[0], re.IGNORECASE) is not None, options))
+        contract_name = contract_name.lower()
+        matches = []
+        for option in options:
+            path = option[0].lower()
+            if any(segment.startswith(contract_name) for segment in path.split('/')):
+                matches.append(option)
         return matches
 
     @staticmethod
     def _read_snippet_from_string(string_content: str, start: int, length: int) -> dict[str, int | str] | None:
         """
-        Reads a specific snippet from a string based on character offsets.
+        Reads a specific snippet from a string based on byte offsets.
+
+        The offsets of the source map refer to the UTF-8 encoded source, therefore the snippet is sliced
+        from a (cached) bytes representation of the content. The slice is taken from a memoryview, so only
+        the decoded snippet is copied. A range cutting a multibyte character is decoded with replacement
+        characters instead of failing. The line is looked up by a binary search in the (cached) offsets
+        of the line breaks of the content.
 
         Args:
-            file_path (str or Path): Path to the source file to read from.
-            start (int): Starting character position (0-based).
-            length (int): Number of characters to read.
+            string_content (str): The source code to read from.
+            start (int): Starting byte position (0-based).
+            length (int): Number of bytes to read.
 
         Returns:
             dict: A dictionary containing:
-                - 'file': The file path (str)
                 - 'code': The extracted code snippet (str)
                 - 'line': The line number (int)
 
         """
-
-        newline_count = string_content[:start].count('\n')
-        snippet = string_content[start: start + length]
+        content_bytes = Mapper._encode_source(string_content)
+        newline_count = bisect.bisect_left(Mapper._newline_offsets(string_content), start)
+        snippet = str(memoryview(content_bytes)[start: start + length], 'utf-8', 'replace')
 
         return {
             'code': snippet,
             'line': newline_count + 1,  # +1 because line numbers are 1-based
         }
 
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _encode_source(string_content: str) -> bytes:
+        """
+        Returns the UTF-8 encoded source content. Cached, since many addresses map into the same source.
+        """
+        return string_content.encode('utf-8')
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _newline_offsets(string_content: str) -> memoryview:
+        """
+        Returns the (ascending) byte offsets of all line breaks in the UTF-8 encoded source content.
+        The number of line breaks before a byte offset is its insertion point into these offsets.
+        The offsets are cached and therefore read-only.
+        """
+        content_bytes = Mapper._encode_source(string_content)
+        offsets = array('i')
+        offset = content_bytes.find(b'\n')
+        while offset != -1:
+            offsets.append(offset)
+            offset = content_bytes.find(b'\n', offset + 1)
+        return memoryview(offsets).toreadonly()
+
     @staticmethod
     def _instruction_index_from_hex_address(pc: int, bytecode: str) -> int:
         """
         Convert a program counter (PC) value to an instruction index in the bytecode.
 
-        This function walks through the bytecode instruction by instruction, counting valid EVM opcodes
-        (including accounting for PUSHn instructions and their data), until it reaches the given PC value.
+        The bytecode is walked only once per contract to build a lookup table from byte offset to
+        instruction index (see ``_instruction_index_table``), so each call is a constant-time table lookup.
 
         Note:
         - If the PC points to the middle of a PUSH instruction's data, the function returns the beginning of the PUSH instruction.
-        - If the PC is equal to the bytecode length, the function returns the total number of instructions.
+        - If the PC is equal to the bytecode length, the function returns the index of the last instruction.
 
         Args:
             pc (int): The program counter value (byte offset into the bytecode)
@@ -274,42 +481,100 @@ class Mapper:
         if bytecode is None or bytecode == "":
             raise ValueError("Bytecode cannot be empty")
 
-        try:
-            if bytecode.startswith("0x"):
-                bytecode = bytecode[2:]
-            bytecode_bytes = bytes.fromhex(bytecode)
-        except ValueError:
-            raise ValueError("Bytecode must be a valid hex string with an even number of characters")
+        instruction_indices = Mapper._instruction_index_table(bytecode)
+        if not instruction_indices:  # e.g. "0x" of an interface or abstract contract
+            raise ValueError("Bytecode cannot be empty")
 
+        # PCs behind the last byte still belong to the last instruction, if it is a PUSH whose data has been cut off.
+        # The PC right behind the (padded) bytecode is accepted as well and maps to the last instruction.
+        if pc < len(instruction_indices):
+            return instruction_indices[pc]
+        if pc > len(instruction_indices):
+            raise ValueError(f"PC value {pc} is greater than the length of the bytecode {len(instruction_indices)}")
+        return instruction_indices[-1]
 
-        # If the PC is at the beginning of the bytecode, return 0 as it indicates the first instruction
-        if pc == 0:
-            return 0
+    @staticmethod
+    def _instruction_indices(bytecode: str) -> array:
+        """
+        Converts every program counter of the bytecode to its instruction index at once.
+
+        This is the batch version of ``_instruction_index_from_hex_address``: the returned array holds
+        the instruction index of each byte offset, where ``result[pc]`` equals
+        ``_instruction_index_from_hex_address(pc, bytecode)``.
 
-        instruction_index: int = -1  # count how many actual EVM instructions we've seen.
-        push_data_bytes = 0 # Length of the data bytes for PUSH instructions
+        Args:
+            bytecode (str): The contract bytecode as a hex string (with or without '0x' prefix)
 
-        # Idea: Go byte by byte until we reach the given program counter (pc) or the end of the bytecode.
+        Returns:
+            array: The instruction index for each byte offset of the (padded) bytecode. The array is a copy
+                   and may be modified by the caller.
+        Raises:
+            ValueError: If the bytecode is empty or invalid
+        """
+        if bytecode is None or bytecode == "":
+            raise ValueError("Bytecode cannot be empty")
+        instruction_indices = Mapper._instruction_index_table(bytecode)
+        if not instruction_indices:
+            raise ValueError("Bytecode cannot be empty")
+        return array('i', instruction_indices.tobytes())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _instruction_index_table(bytecode: str) -> memoryview:
+        """
+        Builds a lookup table from byte offset (program counter) to instruction index.
+
+        The bytecode is walked instruction by instruction. Each instruction occupies one entry per byte,
+        i.e. a PUSHn instruction occupies 1 + n entries, all of which hold the index of the PUSH instruction.
+        If the data of the last PUSH instruction is cut off, the table is padded as if the data was present.
+        The table is cached, so mapping many addresses of the same contract walks the bytecode only once.
+
+        Args:
+            bytecode (str): The contract bytecode as a hex string (with or without '0x' prefix)
+
+        Returns:
+            memoryview: The instruction index for each byte offset of the (padded) bytecode. The table is
+                        read-only, since it is shared between callers.
+        Raises:
+            ValueError: If the bytecode is not a valid hex string
+        """
+        bytecode_bytes = Mapper._decode_bytecode(bytecode)
+        # The length of the instruction each byte would start, translated in a single pass
+        instruction_lengths = bytecode_bytes.translate(_INSTRUCTION_LENGTHS)
+        instruction_indices = array('i')
+        instruction_index = 0
         # current_pc = current position (in bytes) as we walk through the bytecode
-        # current_op = current opcode (in bytes) as we walk through the bytecode
-        # bytecode_length_with_padding = the length of the bytecode inclusive padding zeros
-        bytecode_length_with_padding = 0
-        for current_pc, current_op in enumerate(bytecode_bytes):
-            if push_data_bytes > 0:
-                push_data_bytes -= 1
-            else:
-                instruction_index += 1
-                bytecode_length_with_padding += 1
-                if 0x60 <= current_op <= 0x7f:  # PUSH1 to PUSH32
-                    push_data_bytes = current_op - 0x5f  # Calculate number of data bytes (0x60 - 0x5f = 1 (PUSH1))
-                    bytecode_length_with_padding += push_data_bytes
-            if current_pc == pc:
-                break
-
-        if pc > bytecode_length_with_padding:
-            raise ValueError(f"PC value {pc} is greater than the length of the bytecode {bytecode_length_with_padding}")
-
-        return instruction_index
+        current_pc = 0
+        while current_pc < len(bytecode_bytes):
+            instruction_length = instruction_lengths[current_pc]
+            if instruction_length == 1:
+                instruction_indices.append(instruction_index)
+            else:  # PUSH1 to PUSH32
+                instruction_indices.extend([instruction_index] * instruction_length)
+            instruction_index += 1
+            current_pc += instruction_length
+        return memoryview(instruction_indices).toreadonly()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _decode_bytecode(bytecode: str) -> bytes:
+        """
+        Decodes the hex bytecode into bytes.
+
+        The result is cached, so mapping many addresses of the same contract decodes its bytecode only once.
+
+        Args:
+            bytecode (str): The contract bytecode as a hex string (with or without '0x' prefix)
+
+        Returns:
+            bytes: The decoded bytecode
+        Raises:
+            ValueError: If the bytecode is not a valid hex string
+        """
+        try:
+            return bytes.fromhex(bytecode.removeprefix("0x"))
+        except ValueError:
+            raise ValueError("Bytecode must be a valid hex string with an even number of characters")
 
     @staticmethod
     def _instruction_from_instruction_index(srcmap, instruction_index):
@@ -322,8 +587,10 @@ class Mapper:
         Each entry in the source map may omit fields to save space, inheriting values from
         previous entries (compression).
 
-        This function walks backward from the given instruction index to resolve all fields
-        (offset, length, file ID, jump type, and modifier depth) by applying the compression rules.
+        This function resolves all fields (offset, length, file ID, jump type, and modifier depth)
+        by applying the compression rules while decoding the entries front to back. Entries are only
+        decoded up to the given instruction index, and decoded entries are cached per source map
+        (see ``_source_map_entries``), so each entry is decoded at most once across all lookups.
 
         Args:
             srcmap (str): The Solidity source map string, consisting of semicolon-separated entries.
@@ -342,61 +609,28 @@ class Mapper:
             ValueError: If the instruction index is out of bounds or the source map entry could not
                         be fully resolved due to missing fields.
         """
-        # Split the source map into entries
-        entries = srcmap.split(';')
+        entries, decoded_entries, lock = Mapper._source_map_entries(srcmap)
 
         # Check if the instruction index is valid
         if instruction_index >= len(entries):
             raise ValueError(f"Invalid instruction index {instruction_index}. "
                              f"Source map contains {len(entries)} entries.")
 
+        # Decode the entries which have not been decoded by previous lookups, up to instruction_index.
+        # The decoded entries are only appended while holding the lock, entries decoded before are final.
+        if instruction_index >= len(decoded_entries):
+            with lock:
+                Mapper._decode_source_map_entries(entries, decoded_entries, instruction_index)
+
+        offset, length, file_id, jump, modifiers = decoded_entries[instruction_index]
         result = {
-            'offset': None, # starting character offset in the source file
-            'length': None, # number of characters this instruction corresponds to
-            'file_id': None, # index of the source file
-            'jump': None, # type of jump (e.g., i = into function, o = out of function, - = no jump)
-            'modifiers': None # how deep into modifier context the instruction is
+            'offset': offset,
+            'length': length,
+            'file_id': file_id,
+            'jump': jump,
+            'modifiers': modifiers
         }
 
-        # Keep track of which fields are still missing (so we know when we are done)
-        remaining = set(result.keys())
-
-        # Iterate backwards from instruction_index and populate the values
-        for i in range(instruction_index, -1, -1):
-            entry = entries[i]
-            if not entry:
-                # Compression rule: If an entry is empty, it inherits the values from the previous entry.
-                # Skip empty entries
-                continue
-
-            #offset:length:fileIndex:jump:modifierDepth
-            parts = entry.split(':')
-
-            # Update values based on this entry
-            # Compression rule: If an entry omits an empty field (e.g. ''), it inherits the value from the previous entry.
-            if 'offset' in remaining and len(parts) > 0 and parts[0] != '':
-                result['offset'] = int(parts[0])
-                remaining.remove('offset')
-
-            if 'length' in remaining and len(parts) > 1 and parts[1] != '':
-                result['length'] = int(parts[1])
-                remaining.remove('length')
-
-            if 'file_id' in remaining and len(parts) > 2 and parts[2] != '':
-                result['file_id'] = int(parts[2])
-                remaining.remove('file_id')
-
-            if 'jump' in remaining and len(parts) > 3 and parts[3] != '':
-                result['jump'] = parts[3]
-                remaining.remove('jump')
-
-            if 'modifiers' in remaining and len(parts) > 4 and parts[4] != '':
-                result['modifiers'] = int(parts[4])
-                remaining.remove('modifiers')
-
-            if not remaining:
-                break  # All fields are populated
-
         if result['file_id'] is None:
             raise ValueError(f"Could not find file_id for instruction index {instruction_index}. There is an issue with the source map.")
         elif result['offset'] is None:
@@ -405,53 +639,140 @@ class Mapper:
             raise ValueError(f"Could not find length for instruction index {instruction_index}. There is an issue with the source map.")
         elif result['jump'] is None:
             # We dont need to raise an error here, because we dont need to know the jump type
-            print(f"INFO: Could not find jump for instruction index {instruction_index}")
+            logger.info("Could not find jump for instruction index %d", instruction_index)
         elif result['modifiers'] is None:
             # We dont need to raise an error here, because we dont need to know the modifier depth
-            print(f"INFO: Could not find modifiers for instruction index {instruction_index}")
+            logger.info("Could not find modifiers for instruction index %d", instruction_index)
 
-        return {
-            'offset': result['offset'],
-            'length': result['length'],
-            'file_id': result['file_id'],
-            'jump': result['jump'],
-            'modifiers': result['modifiers']
-        }
+        return result
 
     @staticmethod
-    def _read_from_json_string(json_str:str, item_path: str):
-        byte_stream = io.BytesIO(json_str.encode('utf-8'))
-        objects = ijson.items(ijson.parse(byte_stream), item_path)
-        try:
-            return next(objects)
-        except StopIteration:
-            raise KeyError(f"Path '{item_path}' not found in JSON string '{json_str}'")
+    @functools.lru_cache(maxsize=32)
+    def _source_map_entries(srcmap: str) -> tuple[tuple[str, ...], list[tuple], threading.Lock]:
+        """
+        Splits the source map into its entries and provides the (initially empty) list of decoded entries,
+        which ``_instruction_from_instruction_index`` extends on demand. Cached, so lookups into the same
+        source map share both. The list is only extended while holding the returned lock.
+
+        Args:
+            srcmap (str): The Solidity source map string, consisting of semicolon-separated entries.
+
+        Returns:
+            tuple: The raw entries (tuple of str), the entries decoded so far (list of tuple) and the lock
+                   guarding the decoded entries.
+        """
+        return tuple(srcmap.split(';')), [], threading.Lock()
+
+    @staticmethod
+    def _decode_source_map_entries(entries: tuple[str, ...], decoded_entries: list[tuple], instruction_index: int):
+        """
+        Decodes the source map entries following the already decoded ones, up to instruction_index.
+        Must be called while holding the lock of the decoded entries (see ``_source_map_entries``).
+
+        Args:
+            entries (tuple): The raw source map entries.
+            decoded_entries (list): The entries decoded so far, extended in place.
+            instruction_index (int): The index of the last entry to decode.
+        """
+        # Each decoded entry holds (offset, length, file_id, jump, modifiers):
+        # offset = starting character offset in the source file
+        # length = number of characters this instruction corresponds to
+        # file_id = index of the source file
+        # jump = type of jump (e.g., i = into function, o = out of function, - = no jump)
+        # modifiers = how deep into modifier context the instruction is
+        previous = decoded_entries[-1] if decoded_entries else (None, None, None, None, None)
+        for i in range(len(decoded_entries), instruction_index + 1):
+            entry = entries[i]
+            if entry:
+                # Compression rule: If an entry omits a field (e.g. ''), it inherits the value from the previous entry.
+                # An empty entry inherits all values from the previous entry.
+                #offset:length:fileIndex:jump:modifierDepth
+                fields = list(previous)
+                for field, part in enumerate(entry.split(':')[:5]):
+                    if part != '':
+                        fields[field] = part if field == 3 else int(part)
+                previous = tuple(fields)
+            decoded_entries.append(previous)
 
     @staticmethod
-    def _read_from_json_file(file_path, item_path: str):
+    def _read_from_json_string(json_str:str, keys: tuple[str, ...]):
         """
-        Reads a value from a JSON file using a dot-notation path.
+        Reads a value from a JSON string by following the given keys.
 
-        This method allows accessing nested JSON structures using a path string
-        with dot notation (e.g., "contracts.MyContract.bin-runtime").
+        Args:
+            json_str (str): The JSON document as a string.
+            keys (tuple[str, ...]): The keys leading to the desired value within the JSON.
+
+        Returns:
+            Any: The value at the specified path in the JSON string.
+
+        Raises:
+            KeyError: If the path does not exist in the JSON structure.
+        """
+        try:
+            return Mapper._resolve_json_path(_json_loads(json_str), keys)
+        except KeyError:
+            raise KeyError(f"Path '{'.'.join(keys)}' not found in JSON string '{json_str}'")
+
+    @staticmethod
+    def _read_from_json_content(json_content, keys: tuple[str, ...], file_path):
+        """
+        Reads a value from the parsed content of a JSON file by following the given keys.
 
         Args:
-            file_path (str): Path to the JSON file to read from.
-            item_path (str): Dot-notation path to the desired value within the JSON.
+            json_content (Any): The parsed JSON document.
+            keys (tuple[str, ...]): The keys leading to the desired value within the JSON.
+            file_path (str): Path to the JSON file, used in error messages.
 
         Returns:
-            Any: The value at the specified path in the JSON file.
+            Any: The value at the specified path in the JSON document.
 
         Raises:
-            FileNotFoundError: If the JSON file does not exist.
             KeyError: If the path does not exist in the JSON structure.
         """
+        try:
+            return Mapper._resolve_json_path(json_content, keys)
+        except KeyError:
+            raise KeyError(f"Path '{'.'.join(keys)}' not found in JSON file '{file_path}'")
+
+    @staticmethod
+    def _parse_json_file(file_path):
+        """
+        Parses a JSON file. Read as bytes, which orjson parses directly without decoding them first.
+
+        Args:
+            file_path (str): Path to the JSON file to parse.
+
+        Returns:
+            Any: The parsed JSON document.
+        """
         with open(file_path, "rb") as f:
-            objects = ijson.items(f, item_path)
-            try:
-                return next(objects)
-            except StopIteration:
-                raise KeyError(f"Path '{item_path}' not found in JSON file '{file_path}'")
+            return _json_loads(f.read())
+
+    @staticmethod
+    def _resolve_json_path(json_content, keys: tuple[str, ...]):
+        """
+        Walks a parsed JSON document along the given keys.
+
+        Keys of the compiler output may contain dots themselves (e.g. "contracts/BeerBar.sol"),
+        therefore the keys are given one by one instead of as a dot-notation path.
+
+        Args:
+            json_content (Any): The parsed JSON document.
+            keys (tuple[str, ...]): The keys leading to the desired value within the JSON.
+
+        Returns:
+            Any: The value at the end of the keys.
+
+        Raises:
+            KeyError: If the path does not exist in the JSON structure.
+        """
+        node = json_content
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                raise KeyError('.'.join(keys))
+            node = node[key]
+        return node
 
 if __name__ == "__main__":
     import argparse
@@ -470,6 +791,7 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
     result = Mapper.map_hex_address(
         compiler_output_json=args.compiler_output_json,
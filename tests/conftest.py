@@ -0,0 +1,16 @@
+import functools
+import json
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def load_compiler_output():
+    """Parses each compiler output once per session, so that all csv rows and test modules referencing the same file share it."""
+
+    @functools.lru_cache(maxsize=None)
+    def load(compiler_output_json: str) -> dict:
+        with open(compiler_output_json, "rb") as f:
+            return json.load(f)
+
+    return load
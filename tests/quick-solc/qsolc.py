@@ -1,9 +1,42 @@
 import argparse
+import asyncio
+import hashlib
 import os
 import json
+import re
+import shutil
+import stat
 import subprocess
+import sys
+from pathlib import Path
 from typing import Dict, Any, List, Tuple
 
+try:
+    # orjson is an optional dependency which (de)serializes large compiler inputs and outputs considerably faster
+    import orjson
+
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=4 if indent else None).encode("utf-8")
+    _json_loads = json.loads
+
+# An array element in a key path, e.g. "remappings[0]"
+INDEXED_KEY_PATTERN = re.compile(r'^([^\[]*)\[(\d+)\]$')
+# A dot separating the keys of a key path, e.g. in "settings.optimizer.enabled", but not an escaped dot "\."
+KEY_SEPARATOR_PATTERN = re.compile(r'(?<!\\)\.')
+# Compiler outputs are cached here, keyed by a hash of the compiler input
+CACHE_DIR = Path.home() / ".cache" / "qsolc"
+# The outputs needed by the solidity_address_mapper (opcodes are only used by its tests)
+DEFAULT_OUTPUTS = [
+    "evm.deployedBytecode.sourceMap",
+    "evm.deployedBytecode.object",
+    "evm.deployedBytecode.opcodes",
+    "metadata"
+]
+
 def str_to_bool(value):
     if value.lower() in {'true', '1', 'yes'}:
         return True
@@ -31,60 +64,59 @@ def update_nested_dict(d: Dict[str, Any], keys: List[str], value: Any, append_to
             return d
         return value
 
-    current_key = keys[0]
-    
-    # Handle array indexing (e.g., key[0], key[1])
-    if current_key.endswith(']'):
-        base_key, index_str = current_key[:-1].split('[')
-        try:
-            index = int(index_str)
-        except ValueError:
+    # Walk down the key path, creating missing dictionaries and arrays on the way
+    cursor = d
+    last = len(keys) - 1
+    for depth, current_key in enumerate(keys):
+        # Handle array indexing (e.g., key[0], key[1])
+        indexed_key = INDEXED_KEY_PATTERN.match(current_key)
+        if indexed_key:
+            base_key, index = indexed_key.group(1), int(indexed_key.group(2))
+
+            if base_key not in cursor:
+                cursor[base_key] = []
+            elif not isinstance(cursor[base_key], list):
+                raise ValueError(f"Cannot index '{base_key}' as an array; it is not a list.")
+            array = cursor[base_key]
+
+            # Ensure the array is long enough
+            if len(array) <= index:
+                array.extend([None] * (index + 1 - len(array)))
+
+            if depth == last:
+                array[index] = value
+            else:
+                if not array[index]:
+                    array[index] = {}
+                cursor = array[index]
+            continue
+        if current_key.endswith(']'):
             raise ValueError(f"Invalid array index in key path: '{current_key}'.")
-        
-        if base_key not in d:
-            d[base_key] = []
-        elif not isinstance(d[base_key], list):
-            raise ValueError(f"Cannot index '{base_key}' as an array; it is not a list.")
-        
-        # Ensure the array is long enough
-        while len(d[base_key]) <= index:
-            d[base_key].append(None)
-        
-        if len(keys) == 1:
-            d[base_key][index] = value
-        else:
-            d[base_key][index] = update_nested_dict(
-                d[base_key][index] or {}, keys[1:], value, append_to_arrays
-            )
-        return d
-
-    # Handle regular dictionary keys
-    if len(keys) == 1:
-        if append_to_arrays and isinstance(d.get(current_key), list) and isinstance(value, list):
-            d[current_key].extend(value)
+
+        # Handle regular dictionary keys
+        if depth == last:
+            if append_to_arrays and isinstance(cursor.get(current_key), list) and isinstance(value, list):
+                cursor[current_key].extend(value)
+            else:
+                cursor[current_key] = value
         else:
-            d[current_key] = value
-    else:
-        if current_key not in d:
-            d[current_key] = {}
-        elif not isinstance(d[current_key], dict):
-            raise ValueError(f"Cannot set nested key '{keys[1]}' under '{current_key}'; it is not a dictionary.")
-        d[current_key] = update_nested_dict(d[current_key], keys[1:], value, append_to_arrays)
+            if current_key not in cursor:
+                cursor[current_key] = {}
+            elif not isinstance(cursor[current_key], dict):
+                raise ValueError(f"Cannot set nested key '{keys[depth + 1]}' under '{current_key}'; it is not a dictionary.")
+            cursor = cursor[current_key]
     return d
 
 def parse_key_value_pair(arg: str) -> Tuple[List[str], Any]:
     """Parse a single argument in the format 'key.path=value' into a key path and value."""
-    if '=' not in arg:
+    key_path, separator, value_str = arg.partition('=')  # Split on the first '=' only
+    if not separator:
         raise ValueError(f"Invalid argument format: '{arg}'. Expected 'key.path=value'.")
-    
-    key_path, value_str = arg.split('=', 1)  # Split on the first '=' only
     if not key_path:
         raise ValueError(f"Key path cannot be empty in argument: '{arg}'.")
-    
-    # Escape dots
-    key_path = key_path.replace('\\.', '__TEMP_DOT_E6C8ED1B-BA4A-43DB-A8DA-742800F8E099___')
 
-    keys = key_path.split('.')
+    # Split at dots, except for escaped ones, and unescape them
+    keys = [key.replace('\\.', '.') for key in KEY_SEPARATOR_PATTERN.split(key_path)]
     try:
         # Attempt to parse the value as JSON to support arrays, numbers, booleans, etc.
         value = json.loads(value_str)
@@ -92,16 +124,227 @@ def parse_key_value_pair(arg: str) -> Tuple[List[str], Any]:
         # If parsing fails, treat the value as a string
         value = value_str
 
-    # Restore escaped dots
-    keys = [key.replace('__TEMP_DOT_E6C8ED1B-BA4A-43DB-A8DA-742800F8E099___', '.') for key in keys]
     return keys, value
 
+def compile_cache_key(compiler_input: bytes, source_files: List[str], jobs: int = 1) -> str:
+    """
+    Hash the compiler input together with the content of the source files and the solc executable.
+    Imported files (e.g. via remappings) are not part of the key.
+    jobs is the number of solc processes, since a merged parallel output differs from a single run.
+    """
+    key = hashlib.blake2b(compiler_input, digest_size=32)
+    key.update(f"jobs:{jobs}".encode("utf-8"))
+    for source_file in source_files:
+        key.update(source_file.encode("utf-8"))
+        with open(source_file, 'rb') as f:
+            key.update(hashlib.blake2b(f.read()).digest())
+    # A different or updated solc produces a different output
+    solc = shutil.which('solc')
+    if solc:
+        solc_stat = os.stat(solc)
+        key.update(f"{os.path.realpath(solc)}:{solc_stat.st_size}:{solc_stat.st_mtime_ns}".encode("utf-8"))
+    return key.hexdigest()
+
+def write_to_cache(cache_file: Path, output: bytes):
+    """Store a compiler output in the cache. Written to a temporary file first, so readers never see partial output."""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    temp_file.write_bytes(output)
+    os.replace(temp_file, cache_file)
+
+def print_output(output: str, output_path: str | None):
+    """Write the compiler output to output_path and print the path, or print the output if no path is given."""
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output)
+        print(output_path)
+    else:
+        print(output)
+
+def solc_command(directories: List[str]) -> List[str]:
+    """The command running solc on a standard-JSON input read from stdin."""
+    return ['solc', '--allow-paths', ','.join(directories), '--standard-json']
+
+def run_solc(compiler_input: bytes, directories: List[str]) -> Tuple[int, bytes, bytes]:
+    """Run solc on the compiler input. Returns the return code, output and error output."""
+    process = subprocess.run(solc_command(directories), input=compiler_input, capture_output=True)
+    return process.returncode, process.stdout, process.stderr
+
+def renumber_source_map(source_map: str, file_ids: Dict[int, int]) -> str:
+    """
+    Replace the file ids in a source map (s:l:f:j:m entries separated by ';') according to file_ids.
+    File ids without a replacement (e.g. -1) are left unchanged.
+    """
+    entries = source_map.split(';')
+    for i, entry in enumerate(entries):
+        fields = entry.split(':')
+        if len(fields) > 2 and fields[2]:
+            file_id = int(fields[2])
+            fields[2] = str(file_ids.get(file_id, file_id))
+            entries[i] = ':'.join(fields)
+    return ';'.join(entries)
+
+def source_map_file_ids(source_map: str) -> set:
+    """The file ids referenced by a source map."""
+    file_ids = set()
+    for entry in source_map.split(';'):
+        fields = entry.split(':')
+        if len(fields) > 2 and fields[2]:
+            file_ids.add(int(fields[2]))
+    return file_ids
+
+def merge_outputs(outputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the outputs of several solc runs into one output.
+    Each run numbers its sources from 0, therefore the sources are renumbered and the
+    source maps of the contracts are updated accordingly. Sources and contracts contained in
+    several outputs (e.g. an imported file) are taken from the first output.
+    Generated sources (e.g. Yul utility code since solc 0.8) are numbered by each run right after
+    its sources. They are moved above all merged sources, so they never point to a source of another run.
+    """
+    merged = {"sources": {}, "contracts": {}}
+    for output in outputs:
+        for source_name, source in output.get("sources", {}).items():
+            if source_name not in merged["sources"]:
+                merged["sources"][source_name] = dict(source, id=len(merged["sources"]))
+
+    next_generated_id = len(merged["sources"])
+    errors = []
+    for output in outputs:
+        sources = output.get("sources", {})
+        file_ids = {source["id"]: merged["sources"][source_name]["id"] for source_name, source in sources.items()}
+
+        bytecodes = []
+        for source_name, contracts in output.get("contracts", {}).items():
+            if source_name in merged["contracts"]:
+                continue
+            for contract in contracts.values():
+                bytecodes.extend(bytecode for bytecode in contract.get("evm", {}).values() if isinstance(bytecode, dict))
+            merged["contracts"][source_name] = contracts
+
+        # Generated sources of this run get the ids following the ones of the previous runs
+        referenced_ids = set()
+        for bytecode in bytecodes:
+            referenced_ids.update(generated_source["id"] for generated_source in bytecode.get("generatedSources", []))
+            if "sourceMap" in bytecode:
+                referenced_ids.update(source_map_file_ids(bytecode["sourceMap"]))
+        generated_ids = {file_id for file_id in referenced_ids if file_id >= len(sources)}
+        for generated_id in generated_ids:
+            file_ids[generated_id] = next_generated_id + generated_id - len(sources)
+        if generated_ids:
+            next_generated_id += max(generated_ids) - len(sources) + 1
+
+        for bytecode in bytecodes:
+            for generated_source in bytecode.get("generatedSources", []):
+                generated_source["id"] = file_ids[generated_source["id"]]
+            if "sourceMap" in bytecode:
+                bytecode["sourceMap"] = renumber_source_map(bytecode["sourceMap"], file_ids)
+        errors.extend(output.get("errors", []))
+
+    if errors:
+        merged["errors"] = errors
+    return merged
+
+def compile_parallel(result: Dict[str, Any], directories: List[str], jobs: int) -> Tuple[int, bytes, bytes]:
+    """
+    Split the sources into (at most) jobs groups, compile each group by a separate solc process
+    concurrently and merge their outputs.
+    Returns the return code, output and error output like a single solc run.
+    """
+    sources = list(result['sources'].items())
+    groups = [dict(sources[i::jobs]) for i in range(min(jobs, len(sources)))]
+
+    async def run_solc_async(compiler_input: bytes) -> Tuple[int, bytes, bytes]:
+        process = await asyncio.create_subprocess_exec(
+            *solc_command(directories),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate(input=compiler_input)
+        return process.returncode, stdout, stderr
+
+    async def run_all():
+        return await asyncio.gather(
+            *(run_solc_async(_json_dumps(dict(result, sources=group))) for group in groups))
+
+    runs = asyncio.run(run_all())
+    for returncode, stdout, stderr in runs:
+        if returncode != 0:
+            return returncode, stdout, stderr
+    merged = merge_outputs([_json_loads(stdout) for _, stdout, _ in runs])
+    return 0, _json_dumps(merged), b""
+
+def compile_standard_json(
+        result: Dict[str, Any],
+        compiler_input: bytes | None = None,
+        use_cache: bool = False,
+        parallel: int = 1
+) -> Tuple[int, bytes, bytes]:
+    """
+    Compile a standard-JSON compiler input by solc, allowing solc to read the directories of the sources.
+    Import this function to compile several inputs from a single Python process, instead of starting qsolc for each.
+    compiler_input is the serialized result, if it is already at hand.
+    Returns the return code, output and error output of solc.
+    """
+    if 'sources' not in result or not isinstance(result['sources'], dict):
+        raise ValueError("no 'sources' provided")
+    if compiler_input is None:
+        compiler_input = _json_dumps(result)
+
+    # Check if we have to allow directories
+    # (each url is only stat'ed and made absolute once)
+    directories = []
+    source_files = []
+    for source in result['sources'].values():
+        if 'urls' in source and isinstance(source['urls'], list):
+            for url in source['urls']:
+                try:
+                    mode = os.stat(url).st_mode
+                except OSError:
+                    continue
+                path = os.path.abspath(url)
+                if stat.S_ISDIR(mode):
+                    directories.append(path)
+                elif stat.S_ISREG(mode):
+                    directories.append(os.path.dirname(path))
+                    source_files.append(path)
+    # Sources often share a directory, solc only needs each directory once
+    directories = list(dict.fromkeys(directories))
+
+    # The number of solc processes to run, at most one per source
+    jobs = max(1, min(parallel, len(result['sources'])))
+
+    # Reuse the output of a previous run, if neither the compiler input nor the sources have changed
+    cache_file = None
+    if use_cache:
+        cache_file = CACHE_DIR / compile_cache_key(compiler_input, source_files, jobs)
+        if cache_file.is_file():
+            return 0, cache_file.read_bytes(), b""
+
+    # Run solidity compiler
+    if jobs > 1:
+        returncode, stdout, stderr = compile_parallel(result, directories, jobs)
+    else:
+        returncode, stdout, stderr = run_solc(compiler_input, directories)
+
+    if returncode == 0 and cache_file:
+        # A cache that cannot be written must not discard the compiler output
+        try:
+            write_to_cache(cache_file, stdout)
+        except OSError as e:
+            print(f"Warning: could not write to cache: {e}", file=sys.stderr)
+    return returncode, stdout, stderr
+
 def main():
     parser = argparse.ArgumentParser(description="A script to process input flags.")
     parser.add_argument("pairs", nargs='+', help="Key-value pairs in the format 'key.path=value'")
 
     parser.add_argument('-o', '--output', type=str, help="Output file path. If not provided, the output will be printed to stdout.") 
     parser.add_argument('-d', '--debug', type=str_to_bool, default="false" , help="Enable debug mode. If set to true, the input JSON will be saved to 'compiler_input.json'.") 
+    parser.add_argument('--cache', action='store_true', help=f"Reuse the output of a previous run, if neither the compiler input, the source files nor solc have changed. Files imported by the sources are not checked for changes. Compiler outputs are cached in {CACHE_DIR}.")
+    parser.add_argument('--parallel', type=int, default=1, help="Compile the sources by up to PARALLEL solc processes running concurrently and merge their outputs. Only for sources which do not import each other.")
+    parser.add_argument('--outputs', nargs='+', default=DEFAULT_OUTPUTS, help="The outputs solc should generate for each contract (outputSelection). Defaults to the outputs needed by the mapper and its tests.")
     
     # Initialize the JSON structure
     result = {
@@ -112,22 +355,16 @@ def main():
             },
             "outputSelection": {
                 "*": {
-                    "*": [
-                        "evm.deployedBytecode.sourceMap",
-                        "evm.deployedBytecode.object",
-                        "evm.deployedBytecode.opcodes",
-                        "metadata"
-                    ]
+                    "*": []
                 }
-            },
-            "optimizer": {},
-            "debug": {}
+            }
         },
         "sources": {}
     }
 
     # Parse arguments
     args = parser.parse_args()
+    result["settings"]["outputSelection"]["*"]["*"] = args.outputs
 
    # Parse json key-value pairs
     try:
@@ -137,48 +374,27 @@ def main():
     except ValueError as e:
         print(f"Error: {e}")
 
+    # Serialize the compiler input once, it is both saved for debugging and passed to solc
+    compiler_input = _json_dumps(result, indent=True)
+
     # Save to file if debug is enabled
     if args.debug:
-        with open("compiler_input.json", 'w') as f:
-            f.write(json.dumps(result, indent=4))
+        with open("compiler_input.json", 'wb') as f:
+            f.write(compiler_input)
     #print(f"Compiler input JSON saved to compiler_input.json")
 
-    # Check if we have to allow directories
-    source_paths = []
-    if 'sources' not in result or not isinstance(result['sources'], dict):
-        print("Error: no 'sources' provided")
+    try:
+        returncode, stdout, stderr = compile_standard_json(
+            result, compiler_input, use_cache=args.cache, parallel=args.parallel)
+    except ValueError as e:
+        print(f"Error: {e}")
         return
-    for source in result['sources'].values():
-        if 'urls' in source and isinstance(source['urls'], list):
-            for url in source['urls']:
-                if os.path.exists(url):
-                    if os.path.isdir(url):
-                        source_paths.append(os.path.abspath(url))
-                    elif os.path.isfile(url):
-                        source_paths.append(os.path.abspath(os.path.dirname(url)))
-
-    directories = [os.path.abspath(path) for path in source_paths]
-
-    # Run solidity compiler
-    #print("Running solidity compiler...")
-    process = subprocess.Popen(
-        ['solc', '--allow-paths', ','.join(directories) , '--standard-json'],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = process.communicate(input=json.dumps(result, indent=4).encode("utf-8"))
 
     # Return the output
-    if process.returncode != 0:
+    if returncode != 0:
         print(f"Error: {stderr.decode()}")
         return
-    elif args.output:
-        with open(args.output, 'w') as f:
-            f.write(stdout.decode())
-        print(args.output)
-    else:
-        print(stdout.decode())
+    print_output(stdout.decode(), args.output)
         
 
 
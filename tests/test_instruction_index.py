@@ -4,8 +4,18 @@ import os
 (DIR,FILE) = os.path.split(__file__)
 (BASE,EXT) = os.path.splitext(FILE)
 
+import re
+from array import array
+
 from solidity_address_mapper.mapper import Mapper, MapperResult
 
+# Length of the instruction starting with a given opcode: 1 + n for PUSHn (0x60 - 0x7f), otherwise 1
+INSTRUCTION_LENGTHS = bytes(op - 0x5e if 0x60 <= op <= 0x7f else 1 for op in range(256))
+# The payloads the compiler lists in opcodes right after PUSH1 to PUSH32, e.g. 0x362A95 in "PUSH3 0x362A95"
+PUSH_DATA_PATTERN = re.compile(r"\bPUSH[1-9][0-9]? (\S+)")
+# The all-zero payload of each PUSH size, to recognize zero pushes by a single comparison
+ZERO_PAYLOADS = [bytes(size) for size in range(33)]
+
 
 @csv_params(
     base_dir=DIR,
@@ -16,7 +26,8 @@ from solidity_address_mapper.mapper import Mapper, MapperResult
 def test_instruction_index(
         compiler_output_json: str,
         contract_node: str,
-        contract_name: str
+        contract_name: str,
+        load_compiler_output
 ):
     """Test that the instruction index is correctly calculated."""
     # Create a mapping from 'opcode' to 'index', for each index in the bin_runtime.
@@ -25,31 +36,44 @@ def test_instruction_index(
 
     if not os.path.isfile(compiler_output_json):
         raise FileNotFoundError(f"compiler_output_json not found: {compiler_output_json}")
-    bin_runtime = Mapper._read_from_json_file(
-        compiler_output_json,
-        f"contracts.{contract_node}.{contract_name}.evm.deployedBytecode.object")
-    opcodes = Mapper._read_from_json_file(
-        compiler_output_json,
-        f"contracts.{contract_node}.{contract_name}.evm.deployedBytecode.opcodes")
-    instruction_map = create_instruction_mapping(bin_runtime, opcodes)
+    compiler_output = load_compiler_output(compiler_output_json)
+    bin_runtime = compiler_output["contracts"][contract_node][contract_name]["evm"]["deployedBytecode"]["object"]
+    opcodes = compiler_output["contracts"][contract_node][contract_name]["evm"]["deployedBytecode"]["opcodes"]
+    starts, ends = create_instruction_mapping(bin_runtime, opcodes)
 
     # Test the Mapper
-    for idx, (start, end) in instruction_map:
-        for i in range(start, end + 1):
-            # For each position in bin_runtime we get the instruction index from the mapper
-            # The instruction index should be equal to the idx from instruction_map.
-            # For example, for the first two bytes (0,1) we should get instruction index 0 (PUSH1) and so on.
-            instruction_index = Mapper._instruction_index_from_hex_address(i, bin_runtime)
-            assert instruction_index == idx, f"expected {idx} but got {instruction_index}"
+    # The instruction index for each position in bin_runtime should be equal to the index into starts/ends.
+    # For example, for the first two bytes (0,1) we should get instruction index 0 (PUSH1) and so on.
+    expected = [idx for idx, (start, end) in enumerate(zip(starts, ends)) for _ in range(start, end + 1)]
+    # We get the instruction index for all positions in bin_runtime from the mapper at once
+    actual = Mapper._instruction_indices(bin_runtime).tolist()
+    assert actual == expected, first_mismatch(actual, expected)
+    # The lookup of a single address should find the instruction starting there
+    assert [Mapper._instruction_index_from_hex_address(start, bin_runtime) for start in starts] == list(range(len(starts)))
 
 
+def first_mismatch(actual: list[int], expected: list[int]) -> str:
+    """Describes the first position at which the instruction indices differ."""
+    i = next((i for i, (a, e) in enumerate(zip(actual, expected)) if a != e), min(len(actual), len(expected)))
+    if i == len(actual) or i == len(expected):
+        return f"{len(expected)} bytes expected but got {len(actual)}"
+    return f"at byte {i}: expected {expected[i]} but got {actual[i]}"
 
 
 def create_instruction_mapping(
         bin_runtime: str,
-        opcodes: str
-) -> list[tuple[int, tuple[int, int]]]:
-    """Maps instruction indices to byte ranges in the binary runtime."""
+        opcodes: str,
+        *,
+        verify: bool = __debug__
+) -> tuple[array, array]:
+    """Maps instruction indices to byte ranges in the binary runtime.
+
+    Returns the (inclusive) start and end position of each instruction as two arrays,
+    both indexed by the instruction index.
+
+    If verify is set (default unless assertions are disabled), the mapping is verified against the opcodes
+    of the compiler. Otherwise, the PUSH payloads are not decoded at all.
+    """
 
     # Create a mapping from 'opcode' to 'index', for each index in the bin_runtime.
     # For example, the frequent initial bytes, 0x60 and 0x80, belong to the PUSH1 instruction.
@@ -57,51 +81,61 @@ def create_instruction_mapping(
 
     def format_push_data(data_bytes: bytes) -> str:
         """Converts data bytes to a hex string without leading zeros."""
-        value = int.from_bytes(data_bytes, byteorder="big")
-        hex_str = hex(value)[2:]  # Strip '0x'
-        return f"0x{hex_str.upper()}" if value != 0 else "0x0"
-
-    bytecode = bytes.fromhex(bin_runtime)
-    mapping = []
+        if data_bytes == ZERO_PAYLOADS[len(data_bytes)]:
+            return '0x0'
+        hex_str = data_bytes.hex().upper().lstrip('0')  # no int conversion, even for PUSH32
+        return '0x' + hex_str
+
+    # Decoded once per contract and shared with the mapper
+    bytecode = Mapper._decode_bytecode(bin_runtime)
+    # Translate every byte into the length of the instruction it would start, in a single pass in C
+    instruction_lengths = bytecode.translate(INSTRUCTION_LENGTHS)
+    # every instruction takes at least one byte, so there are at most len(bytecode) instructions
+    starts = array('i', [0]) * len(bytecode)
+    ends = array('i', [0]) * len(bytecode)
     bytecode_index = 0
     instruction_idx = 0
 
     # opcodes counter is used to verify that we have constructed the same amount of opcodes as the compiler
     opcodes_counter = 0
+    # the formatted PUSH payloads are used to verify them against the payloads listed in opcodes
+    push_data = []
 
     while bytecode_index < len(bytecode):
-        op = bytecode[bytecode_index]
-
-        if 0x60 <= op <= 0x7f:  # PUSH1-PUSH32
-            # calculate the position (start, end) where the payload for the PUSH operation is located
-            data_size = op - 0x5f
-            start = bytecode_index
-            end = bytecode_index + data_size  # inclusive range
-            mapping.append((instruction_idx, (start, end)))
+        instruction_length = instruction_lengths[bytecode_index]
+        # the instruction covers the positions (start, end), for a PUSH operation including its payload
+        starts[instruction_idx] = bytecode_index
+        ends[instruction_idx] = bytecode_index + instruction_length - 1
 
-            # read the payload for the PUSH operation from the bytecode
-            data_bytes = bytecode[bytecode_index + 1:bytecode_index + 1 + data_size]
-            # append zero padding until its length is equal data_size
-            data_bytes = data_bytes + b'\x00' * (data_size - len(data_bytes))
+        if instruction_length > 1:  # PUSH1-PUSH32
+            if verify:
+                # read the payload for the PUSH operation from the bytecode
+                data_bytes = bytecode[bytecode_index + 1:bytecode_index + instruction_length]
+                # append zero padding until its length is equal to the data size
+                data_bytes = data_bytes + b'\x00' * (instruction_length - 1 - len(data_bytes))
 
-            formatted_data = format_push_data(data_bytes)
-
-            bytecode_index += 1 + data_size
+                push_data.append(format_push_data(data_bytes))
 
             # the compiler create for a PUSH3 the following entry in opcodes: PUSH3 0x362A95
             # therefore we have to add additionally 1 to the opcodes_counter (+1 for 0x362A95)
             opcodes_counter +=1
-        else:
-            mapping.append((instruction_idx, (bytecode_index, bytecode_index)))
-            bytecode_index += 1
 
+        bytecode_index += instruction_length
         instruction_idx += 1
 
         # we have to add additionally 1 to the opcodes_counter (+1 for the last instruction)
         opcodes_counter+=1
 
 
-    # verify we got the same amount of instructions as the compiler
-    assert (opcodes_counter == len(opcodes.split()))
+    # drop the slots not taken by an instruction
+    del starts[instruction_idx:]
+    del ends[instruction_idx:]
+
+    if verify:
+        # verify we got the same amount of instructions as the compiler
+        # (solc terminates every opcode with a single space, so counting them needs no list of tokens)
+        assert (opcodes_counter == opcodes.count(' '))
+        # verify we read the same PUSH payloads as the compiler
+        assert (push_data == PUSH_DATA_PATTERN.findall(opcodes))
 
-    return mapping
+    return starts, ends
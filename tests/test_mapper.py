@@ -1,6 +1,9 @@
+import pytest
 from pytest_csv_params.decorator import csv_params
 
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 (DIR,FILE) = os.path.split(__file__)
 (BASE,EXT) = os.path.splitext(FILE)
 
@@ -11,6 +14,8 @@ from solidity_address_mapper.mapper import Mapper, MapperResult
     data_file=f"{BASE}.csv",
     id_col="id"
 )
+# The compiler output is either passed as path or as the already parsed JSON output
+@pytest.mark.parametrize("parsed", [False, True], ids=["path", "parsed"])
 
 def test_mapper(
         compiler_output_json: str,
@@ -18,13 +23,99 @@ def test_mapper(
         contract_name: str,
         address_hex: str,
         source_line: str,
-        source_code: str
+        source_code: str,
+        parsed: bool,
+        load_compiler_output
 ):
     result: MapperResult = Mapper.map_hex_address(
-        compiler_output_json,
+        load_compiler_output(compiler_output_json) if parsed else compiler_output_json,
         address_hex,
         contract_name)
     assert (result != None)
     assert (result.file == contract_node)
     assert (result.code == source_code.replace("\\r","\r").replace("\\n","\n"))
     assert (result.line == int(source_line))
+
+
+def test_map_hex_addresses():
+    """Test that mapping several addresses at once yields the same results as mapping them one by one."""
+    compiler_output_json = "tests/compiler0826/compiled/BeerBar.json"
+    addresses_hex = ["0x18AB", "0x193F", "0x1940", "0x0", "0xFFFFFF"]
+    results = Mapper.map_hex_addresses(compiler_output_json, addresses_hex, "BeerBar")
+    assert (len(results) == len(addresses_hex))
+    for address_hex, result in zip(addresses_hex, results):
+        expected = Mapper.map_hex_address(compiler_output_json, address_hex, "BeerBar")
+        assert (str(result) == str(expected))
+
+
+def test_map_hex_address_reloads_modified_compiler_output(tmp_path):
+    """Test that a compiler output which changed since the last lookup is read again."""
+    compiler_output_json = tmp_path / "EtherLotto.json"
+    shutil.copyfile("tests/compiler0517/compiled/EtherLotto.json", compiler_output_json)
+    result = Mapper.map_hex_address(str(compiler_output_json), "0x00F9", "EtherLotto")
+    assert (result.file == "compiler0517/EtherLotto.sol")
+
+    shutil.copyfile("tests/compiler0612/compiled/EtherLotto.json", compiler_output_json)
+    modification_time = os.stat(compiler_output_json).st_mtime_ns + 1_000_000_000
+    os.utime(compiler_output_json, ns=(modification_time, modification_time))
+    result = Mapper.map_hex_address(str(compiler_output_json), "0x00F9", "EtherLotto")
+    assert (result.file == "compiler0612/contracts/EtherLotto.sol")
+
+
+def test_resolve_json_path_keys_with_dots():
+    """Test that keys containing dots are followed exactly, even if a sibling key prefixes them."""
+    json_content = {"a": {"b.c": 1}, "a.b": {"c": 2}}
+    assert (Mapper._resolve_json_path(json_content, ("a", "b.c")) == 1)
+    assert (Mapper._resolve_json_path(json_content, ("a.b", "c")) == 2)
+
+
+def test_read_snippet_from_string_non_ascii():
+    """Test that the offsets of the source map are byte offsets into the UTF-8 encoded source."""
+    source = "// Grüße €\nrequire(x);\n"
+    start = len("// Grüße €\n".encode("utf-8"))
+    snippet = Mapper._read_snippet_from_string(source, start, len("require(x)"))
+    assert (snippet == {'code': "require(x)", 'line': 2})
+    # A range ending within a multibyte character does not fail
+    snippet = Mapper._read_snippet_from_string(source, 3, len("Grü".encode("utf-8")) - 1)
+    assert (snippet == {'code': "Gr�", 'line': 1})
+
+
+def test_cached_contract_is_read_only():
+    """Test that the cached values shared between lookups cannot be modified by a caller."""
+    contract = Mapper._load_contract("tests/compiler0826/compiled/BeerBar.json", "BeerBar")
+    with pytest.raises(TypeError):
+        contract['bytecode'] = ""
+    with pytest.raises(TypeError):
+        contract['source_names'][0] = ""
+    with pytest.raises(TypeError):
+        Mapper._instruction_index_table(contract['bytecode'])[0] = 1
+
+
+def test_clear_caches():
+    """Test that clearing the caches releases the loaded contracts and mapping still works afterwards."""
+    compiler_output_json = "tests/compiler0826/compiled/BeerBar.json"
+    expected = str(Mapper.map_hex_address(compiler_output_json, "0x18AB", "BeerBar"))
+    Mapper.clear_caches()
+    assert (Mapper._load_contract_cached.cache_info().currsize == 0)
+    assert (Mapper._instruction_index_table.cache_info().currsize == 0)
+    assert (str(Mapper.map_hex_address(compiler_output_json, "0x18AB", "BeerBar")) == expected)
+
+
+@pytest.mark.parametrize("bytecode", ["", "0x"])
+def test_instruction_index_from_empty_bytecode(bytecode: str):
+    """Test that an empty bytecode, e.g. "0x" of an interface or abstract contract, is reported as such."""
+    with pytest.raises(ValueError, match="Bytecode cannot be empty"):
+        Mapper._instruction_index_from_hex_address(0, bytecode)
+    with pytest.raises(ValueError, match="Bytecode cannot be empty"):
+        Mapper._instruction_indices(bytecode)
+
+
+def test_source_map_decoded_lazily_across_threads():
+    """Test that concurrent lookups in arbitrary order decode the source map like a front to back lookup."""
+    srcmap = "1:2:0:-;;3::1:i;:4;5:6:-1:o:1;::0;7"
+    expected = [Mapper._instruction_from_instruction_index(srcmap, index) for index in range(7)]
+    Mapper.clear_caches()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        actual = list(executor.map(lambda index: Mapper._instruction_from_instruction_index(srcmap, index), [6, 2, 0, 5, 1, 4, 3]))
+    assert (actual == [expected[index] for index in [6, 2, 0, 5, 1, 4, 3]])
+    assert (len(Mapper._source_map_entries(srcmap)[1]) == 7)
@@ -0,0 +1,134 @@
+import importlib.util
+import os
+(DIR,FILE) = os.path.split(__file__)
+
+# qsolc is a script and not part of a package, therefore it is loaded from its file
+_spec = importlib.util.spec_from_file_location("qsolc", os.path.join(DIR, "quick-solc", "qsolc.py"))
+qsolc = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(qsolc)
+
+
+def solc_output(source_names: list[str], source_maps: dict[str, str], generated_ids: dict[str, list[int]] | None = None) -> dict:
+    """Builds a minimal solc output, numbering the sources from 0 like a single solc run."""
+    return {
+        "sources": {source_name: {"id": file_id} for file_id, source_name in enumerate(source_names)},
+        "contracts": {
+            source_name: {
+                "C": {"evm": {"deployedBytecode": {
+                    "object": "00",
+                    "sourceMap": source_map,
+                    "generatedSources": [{"id": file_id} for file_id in (generated_ids or {}).get(source_name, [])]
+                }}}
+            }
+            for source_name, source_map in source_maps.items()
+        }
+    }
+
+
+def deployed_bytecode(output: dict, source_name: str) -> dict:
+    return output["contracts"][source_name]["C"]["evm"]["deployedBytecode"]
+
+
+def test_renumber_source_map():
+    """Test that only the file ids are replaced and omitted or unknown ids are kept."""
+    assert (qsolc.renumber_source_map("1:2:0:-;;3:4:-1;5::1:i:0;:7", {0: 2, 1: 0})
+            == "1:2:2:-;;3:4:-1;5::0:i:0;:7")
+
+
+def test_merge_outputs():
+    """Test that the sources of several runs are renumbered consistently with the source maps."""
+    merged = qsolc.merge_outputs([
+        solc_output(["A.sol"], {"A.sol": "1:2:0:-;3:4:-1"}),
+        solc_output(["B.sol", "Shared.sol"], {"B.sol": "1:2:0:-;3:4:1", "Shared.sol": "5:6:1"}),
+        solc_output(["C.sol", "Shared.sol"], {"C.sol": "1:2:0:-;3:4:1", "Shared.sol": "7:8:1"}),
+    ])
+    assert (merged["sources"] == {"A.sol": {"id": 0}, "B.sol": {"id": 1}, "Shared.sol": {"id": 2}, "C.sol": {"id": 3}})
+    assert (deployed_bytecode(merged, "A.sol")["sourceMap"] == "1:2:0:-;3:4:-1")
+    assert (deployed_bytecode(merged, "B.sol")["sourceMap"] == "1:2:1:-;3:4:2")
+    assert (deployed_bytecode(merged, "C.sol")["sourceMap"] == "1:2:3:-;3:4:2")
+    # A source compiled by several runs is taken from the first one
+    assert (deployed_bytecode(merged, "Shared.sol")["sourceMap"] == "5:6:2")
+
+
+def test_merge_outputs_generated_sources():
+    """Test that generated sources are moved above the merged sources instead of pointing to another source."""
+    merged = qsolc.merge_outputs([
+        solc_output(["A.sol"], {"A.sol": "1:2:0:-;3:4:1;5:6:2"}, {"A.sol": [1, 2]}),
+        solc_output(["B.sol", "C.sol"], {"B.sol": "1:2:0:-;3:4:2", "C.sol": "1:2:1:-;3:4:2"}, {"B.sol": [2], "C.sol": [2]}),
+    ])
+    assert (merged["sources"] == {"A.sol": {"id": 0}, "B.sol": {"id": 1}, "C.sol": {"id": 2}})
+    assert (deployed_bytecode(merged, "A.sol")["sourceMap"] == "1:2:0:-;3:4:3;5:6:4")
+    assert ([source["id"] for source in deployed_bytecode(merged, "A.sol")["generatedSources"]] == [3, 4])
+    assert (deployed_bytecode(merged, "B.sol")["sourceMap"] == "1:2:1:-;3:4:5")
+    assert ([source["id"] for source in deployed_bytecode(merged, "B.sol")["generatedSources"]] == [5])
+    assert (deployed_bytecode(merged, "C.sol")["sourceMap"] == "1:2:2:-;3:4:5")
+
+
+def test_compile_standard_json_caches_parallel_runs_separately(tmp_path, monkeypatch):
+    """Test that the merged output of a parallel run is not served to a single run and vice versa."""
+    monkeypatch.setattr(qsolc, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(qsolc, "run_solc", lambda compiler_input, directories: (0, b"single", b""))
+    monkeypatch.setattr(qsolc, "compile_parallel", lambda result, directories, jobs: (0, b"parallel", b""))
+    result = {"language": "Solidity", "sources": {"A.sol": {"content": ""}, "B.sol": {"content": ""}}}
+
+    assert (qsolc.compile_standard_json(result, use_cache=True, parallel=2)[1] == b"parallel")
+    assert (qsolc.compile_standard_json(result, use_cache=True)[1] == b"single")
+    assert (qsolc.compile_standard_json(result, use_cache=True, parallel=2)[1] == b"parallel")
+
+
+def test_compile_cache_key(tmp_path, monkeypatch):
+    """Test that the cache key changes with the compiler input, the source files and solc."""
+    source_file = tmp_path / "A.sol"
+    source_file.write_text("contract A {}")
+    solc = tmp_path / "solc"
+    solc.write_bytes(b"solc 0.8.26")
+    monkeypatch.setattr(qsolc.shutil, "which", lambda command: str(solc))
+
+    key = qsolc.compile_cache_key(b"input", [str(source_file)])
+    assert (qsolc.compile_cache_key(b"input", [str(source_file)]) == key)
+    assert (qsolc.compile_cache_key(b"other input", [str(source_file)]) != key)
+    assert (qsolc.compile_cache_key(b"input", [str(source_file)], jobs=2) != key)
+
+    source_file.write_text("contract A { uint a; }")
+    changed_source_key = qsolc.compile_cache_key(b"input", [str(source_file)])
+    assert (changed_source_key != key)
+
+    solc.write_bytes(b"solc 0.8.27-nightly")
+    assert (qsolc.compile_cache_key(b"input", [str(source_file)]) != changed_source_key)
+
+
+def test_compile_standard_json_cache(tmp_path, monkeypatch):
+    """Test that a cached output is returned without running solc, and that the cache is only used on request."""
+    monkeypatch.setattr(qsolc, "CACHE_DIR", tmp_path / "cache")
+    runs = []
+    monkeypatch.setattr(qsolc, "run_solc", lambda compiler_input, directories: runs.append(compiler_input) or (0, b"output", b""))
+    result = {"language": "Solidity", "sources": {"A.sol": {"content": "contract A {}"}}}
+
+    assert (qsolc.compile_standard_json(result, use_cache=True) == (0, b"output", b""))
+    assert (qsolc.compile_standard_json(result, use_cache=True) == (0, b"output", b""))
+    assert (len(runs) == 1)
+
+    qsolc.compile_standard_json(result)
+    assert (len(runs) == 2)
+
+
+def test_compile_standard_json_does_not_cache_failures(tmp_path, monkeypatch):
+    """Test that a failed solc run is not cached."""
+    monkeypatch.setattr(qsolc, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(qsolc, "run_solc", lambda compiler_input, directories: (1, b"", b"error"))
+    result = {"language": "Solidity", "sources": {"A.sol": {"content": "contract A {}"}}}
+
+    assert (qsolc.compile_standard_json(result, use_cache=True) == (1, b"", b"error"))
+    assert (not (tmp_path / "cache").exists())
+
+
+def test_compile_standard_json_cache_write_error(tmp_path, monkeypatch, capsys):
+    """Test that an unwritable cache only produces a warning and the compiler output is still returned."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("not a directory")
+    monkeypatch.setattr(qsolc, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(qsolc, "run_solc", lambda compiler_input, directories: (0, b"output", b""))
+    result = {"language": "Solidity", "sources": {"A.sol": {"content": "contract A {}"}}}
+
+    assert (qsolc.compile_standard_json(result, use_cache=True) == (0, b"output", b""))
+    assert ("could not write to cache" in capsys.readouterr().err)